@@ -1,4 +1,6 @@
 from ultralytics import YOLO
+from ultralytics.engine.results import Results
+import torch
 import cv2
 import os
 import sys
@@ -7,11 +9,16 @@ from dotenv import load_dotenv
 # Add parent directory to path to import utilities
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utilities.utils import get_device
+from utilities.inference_cache import CACHE_CONF_FLOOR, InferenceCache, file_digest
 
 
-def detect_video(model_path, video_path, output_path, device, device_name, conf=0.3):
+def detect_video(model_path, video_path, output_path, device, device_name, conf=0.3, cache_dir=None,
+                 cache_max_bytes=2 * 1024 ** 3):
     """
     Detect road damage in a video file
+
+    With cache_dir set, raw predictions are cached per (model, video frame, input size),
+    so a re-run with a different conf or drawing style skips inference.
     """
     # Load model
     print(f"Loading model from: {model_path}")
@@ -42,6 +49,14 @@ def detect_video(model_path, video_path, output_path, device, device_name, conf=
     print(f"Output will be saved to: {output_path}")
     print(f"Using device: {device_name}")
 
+    cache = None
+    if cache_dir:
+        cache = InferenceCache(cache_dir, cache_max_bytes)
+        model_hash = file_digest(model_path)
+        video_hash = file_digest(video_path)
+        imgsz = model.overrides.get('imgsz', 'default')
+        print(f"Using inference cache: {cache_dir}")
+
     frame_count = 0
 
     while cap.isOpened():
@@ -51,10 +66,22 @@ def detect_video(model_path, video_path, output_path, device, device_name, conf=
             break
 
         # Run detection
-        results = model.predict(frame, conf=conf, device=device, verbose=False)
+        if cache is None:
+            results = model.predict(frame, conf=conf, device=device, verbose=False)
+            result = results[0]
+        else:
+            key = cache.make_key(model_hash, f"{video_hash}:{frame_count}:floor{CACHE_CONF_FLOOR}", imgsz)
+            cached = cache.get(key)
+            if cached is None:
+                results = model.predict(frame, conf=CACHE_CONF_FLOOR, device=device, verbose=False)
+                cached = {'boxes': results[0].boxes.data.cpu().numpy()}
+                cache.put(key, cached)
+            boxes = cached['boxes']
+            result = Results(frame, path=video_path, names=model.names,
+                             boxes=torch.from_numpy(boxes[boxes[:, 4] > conf]))
 
         # Annotate frame
-        annotated_frame = results[0].plot()
+        annotated_frame = result.plot()
 
         # Write frame
         out.write(annotated_frame)
@@ -71,6 +98,8 @@ def detect_video(model_path, video_path, output_path, device, device_name, conf=
 
     print(f"\nVideo processing complete! Total frames processed: {frame_count}")
     print(f"Output saved to: {output_path}")
+    if cache is not None:
+        print(f"Inference cache: {cache.stats()}")
 
 
 if __name__ == "__main__":
@@ -85,9 +114,12 @@ if __name__ == "__main__":
     VIDEO_PATH = '../video/1.mp4'
     OUTPUT_PATH = '../video/1_annotated.mp4'
     CONFIDENCE = 0.3
+    CACHE_DIR = '../video/.inference_cache'  # None to disable the inference cache
+    CACHE_MAX_GB = 2
 
     # Choose model format: .pt (PyTorch) or .tflite (TensorFlow Lite)
     # MODEL_PATH = f'./runs/detect/{PROJECT_NAME}/weights/best.pt'
     MODEL_PATH = f'../train/runs/detect/{PROJECT_NAME}/weights/best_saved_model/best_int8.tflite'
 
-    detect_video(MODEL_PATH, VIDEO_PATH, OUTPUT_PATH, device, device_name, CONFIDENCE)
+    detect_video(MODEL_PATH, VIDEO_PATH, OUTPUT_PATH, device, device_name, CONFIDENCE, CACHE_DIR,
+                 CACHE_MAX_GB * 1024 ** 3)
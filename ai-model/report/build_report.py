@@ -0,0 +1,372 @@
+import cv2
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# File names written by camera_control.py on the drone
+DETECTION_PATTERN = re.compile(r'^detect_(\d+)_(\d+\.\d+)\.jpg$')
+# Continuous recording: flight_<start>_<id>.h264, clip mode: clip_<start>_<id>_<clip start>.h264
+FLIGHT_PATTERN = re.compile(r'^(?:flight|clip)_(\d+)_([0-9a-f]+)(?:_\d+)?\.h264$')
+
+STATE_VERSION = 1
+CONFIDENCE_BANDS = [('high', 0.8), ('medium', 0.6), ('low', 0.0)]
+
+
+def scan_flight_outputs(flight_dirs):
+    """
+    Stream detection images and flight recordings from the drone output folders.
+
+    Yields:
+        tuple: ('detection', path, timestamp, score) or ('flight', path, timestamp, flight_id)
+    """
+    for flight_dir in flight_dirs:
+        for root, _, files in os.walk(flight_dir):
+            for name in sorted(files):
+                match = DETECTION_PATTERN.match(name)
+                if match:
+                    yield 'detection', os.path.join(root, name), int(match.group(1)), float(match.group(2))
+                    continue
+                match = FLIGHT_PATTERN.match(name)
+                if match:
+                    yield 'flight', os.path.join(root, name), int(match.group(1)), match.group(2)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Content hash of a file, used as key for the thumbnail cache.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_sidecar_box(image_path):
+    """
+    Read the optional [ymin, xmin, ymax, xmax] box from a detect_*.json next to the image.
+    """
+    json_path = os.path.splitext(image_path)[0] + '.json'
+    if not os.path.exists(json_path):
+        return None
+    try:
+        with open(json_path, 'r') as f:
+            box = json.load(f).get('bbox')
+    except (OSError, ValueError):
+        return None
+    if not box or len(box) != 4:
+        return None
+    return [float(v) for v in box]
+
+
+def make_thumbnail(image_path, cache_dir, thumb_size=256, crop_padding=0.15):
+    """
+    Create the thumbnail (and crop, if a box is known) for one detection image.
+
+    Runs inside a worker process. Only the small result dict travels back to the
+    parent, so full-resolution frames are never held by the report builder.
+    """
+    digest = file_hash(image_path)
+    thumb_path = os.path.join(cache_dir, f"{digest}.jpg")
+    crop_path = os.path.join(cache_dir, f"{digest}_crop.jpg")
+    box = load_sidecar_box(image_path)
+
+    result = {'hash': digest, 'thumb': thumb_path, 'crop': None}
+    need_thumb = not os.path.exists(thumb_path)
+    need_crop = box is not None and not os.path.exists(crop_path)
+
+    if need_thumb or need_crop:
+        image = cv2.imread(image_path)
+        if image is None:
+            result['thumb'] = None
+            return result
+        h, w = image.shape[:2]
+
+        if need_thumb:
+            scale = thumb_size / max(h, w)
+            if scale < 1.0:
+                thumb = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            else:
+                thumb = image
+            cv2.imwrite(thumb_path, thumb, [cv2.IMWRITE_JPEG_QUALITY, 85])
+
+        if need_crop:
+            ymin, xmin, ymax, xmax = box
+            pad_y = (ymax - ymin) * crop_padding
+            pad_x = (xmax - xmin) * crop_padding
+            y0 = max(0, int((ymin - pad_y) * h))
+            x0 = max(0, int((xmin - pad_x) * w))
+            y1 = min(h, int((ymax + pad_y) * h))
+            x1 = min(w, int((xmax + pad_x) * w))
+            if y1 > y0 and x1 > x0:
+                cv2.imwrite(crop_path, image[y0:y1, x0:x1], [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+    if box is not None and os.path.exists(crop_path):
+        result['crop'] = crop_path
+    return result
+
+
+def load_state(state_path):
+    """
+    Load the incremental report state, or start an empty one.
+    """
+    if os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+        if state.get('version') == STATE_VERSION:
+            return state
+        print(f"Ignoring report state with unknown version: {state_path}")
+    return {'version': STATE_VERSION, 'processed': {}, 'flights': {}, 'detections': [], 'segments': {}}
+
+
+def write_json(path, data):
+    """
+    Write JSON atomically so an interrupted run never leaves a broken state file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def assign_segment(flights, timestamp, segment_seconds):
+    """
+    Map a detection timestamp to (flight_id, segment_index).
+
+    The detection belongs to the latest flight started before it; segments are fixed
+    time windows from the flight start, which at constant ground speed correspond to
+    equal stretches of road.
+    """
+    flight_id, start = None, None
+    for fid, flight in flights.items():
+        if flight['start'] <= timestamp and (start is None or flight['start'] > start):
+            flight_id, start = fid, flight['start']
+    if flight_id is None:
+        return 'unassigned', 0
+    return flight_id, int((timestamp - start) // segment_seconds)
+
+
+def update_segment(segments, key, flight_id, index, timestamp, score):
+    """
+    Fold one detection into the running statistics of its segment.
+    """
+    seg = segments.get(key)
+    if seg is None:
+        seg = {
+            'flight': flight_id,
+            'index': index,
+            'count': 0,
+            'score_sum': 0.0,
+            'score_max': 0.0,
+            'first_ts': timestamp,
+            'last_ts': timestamp,
+            'bands': {name: 0 for name, _ in CONFIDENCE_BANDS},
+        }
+        segments[key] = seg
+
+    seg['count'] += 1
+    seg['score_sum'] += score
+    seg['score_max'] = max(seg['score_max'], score)
+    seg['first_ts'] = min(seg['first_ts'], timestamp)
+    seg['last_ts'] = max(seg['last_ts'], timestamp)
+    for name, low in CONFIDENCE_BANDS:
+        if score >= low:
+            seg['bands'][name] += 1
+            break
+
+
+def rebuild_segments(state, segment_seconds):
+    """
+    Assign every known detection again and rebuild the segment statistics.
+
+    Needed when flights were registered after detections were processed: a
+    detection copied before its own recording was filed under 'unassigned' or
+    under the previous flight.
+
+    Returns:
+        int: Number of detections that moved to another segment
+    """
+    state['segments'] = {}
+    moved = 0
+    for det in state['detections']:
+        flight_id, index = assign_segment(state['flights'], det['timestamp'], segment_seconds)
+        key = f"{flight_id}/{index:03d}"
+        update_segment(state['segments'], key, flight_id, index, det['timestamp'], det['score'])
+        if det['segment'] != key:
+            det['segment'] = key
+            moved += 1
+    return moved
+
+
+def summarize_segments(segments):
+    """
+    Segments ordered by maintenance priority (most and most confident detections first).
+    """
+    rows = []
+    for key, seg in segments.items():
+        rows.append(dict(seg, key=key, score_mean=seg['score_sum'] / seg['count']))
+    rows.sort(key=lambda r: (r['count'], r['score_mean']), reverse=True)
+    return rows
+
+
+def write_html(path, state, rows, output_dir):
+    """
+    Render the static HTML report from the accumulated state.
+    """
+    def rel(p):
+        return html.escape(os.path.relpath(p, output_dir).replace(os.sep, '/'))
+
+    by_segment = {}
+    for det in state['detections']:
+        by_segment.setdefault(det['segment'], []).append(det)
+
+    parts = [
+        '<!DOCTYPE html>',
+        '<html><head><meta charset="utf-8"><title>Road Condition Report</title>',
+        '<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}'
+        'td,th{border:1px solid #ccc;padding:4px 8px}img{margin:2px;border:1px solid #999}</style>',
+        '</head><body>',
+        '<h1>Road Condition Report</h1>',
+        f"<p>Generated {time.strftime('%Y-%m-%d %H:%M:%S')} &middot; "
+        f"{len(state['detections'])} detections in {len(rows)} segments</p>",
+        '<h2>Priority list</h2>',
+        '<table><tr><th>Segment</th><th>Detections</th><th>Mean conf.</th><th>Max conf.</th>'
+        '<th>High / Medium / Low</th><th>First seen</th></tr>',
+    ]
+    for row in rows:
+        bands = ' / '.join(str(row['bands'][name]) for name, _ in CONFIDENCE_BANDS)
+        first_seen = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['first_ts']))
+        parts.append(
+            f"<tr><td><a href=\"#{html.escape(row['key'])}\">{html.escape(row['key'])}</a></td>"
+            f"<td>{row['count']}</td><td>{row['score_mean']:.2f}</td><td>{row['score_max']:.2f}</td>"
+            f"<td>{bands}</td><td>{first_seen}</td></tr>"
+        )
+    parts.append('</table>')
+
+    for row in rows:
+        parts.append(f"<h2 id=\"{html.escape(row['key'])}\">Segment {html.escape(row['key'])}</h2><div>")
+        for det in sorted(by_segment.get(row['key'], []), key=lambda d: -d['score']):
+            preview = det['crop'] or det['thumb']
+            if preview is None:
+                continue
+            parts.append(
+                f"<a href=\"{rel(det['image'])}\"><img src=\"{rel(preview)}\" "
+                f"title=\"{det['score']:.2f} @ {det['timestamp']}\"></a>"
+            )
+        parts.append('</div>')
+
+    parts.append('</body></html>')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('\n'.join(parts))
+    os.replace(tmp_path, path)
+
+
+def build_report(flight_dirs, output_dir, segment_seconds=30, workers=None, thumb_size=256):
+    """
+    Build or update the road condition report (report.json + index.html).
+
+    Only detection images that were not processed by a previous run are decoded;
+    thumbnails are cached on disk by image hash and segment statistics are
+    updated incrementally.
+    """
+    cache_dir = os.path.join(output_dir, 'thumbs')
+    os.makedirs(cache_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, 'report_state.json')
+    state = load_state(state_path)
+
+    # First pass: register flights and collect new detections (metadata only)
+    new_detections = []
+    known_flights = len(state['flights'])
+    for kind, path, timestamp, extra in scan_flight_outputs(flight_dirs):
+        if kind == 'flight':
+            state['flights'].setdefault(extra, {'start': timestamp, 'video': path})
+            continue
+        if path in state['processed']:
+            continue
+        new_detections.append((path, timestamp, extra))
+
+    print(f"Known flights: {len(state['flights'])}")
+    if len(state['flights']) > known_flights:
+        moved = rebuild_segments(state, segment_seconds)
+        if moved:
+            print(f"Moved {moved} earlier detections to newly copied flights")
+    print(f"New detection images: {len(new_detections)} "
+          f"(already processed: {len(state['processed'])})")
+
+    # Second pass: thumbnails in a process pool, bounded number of tasks in flight
+    max_in_flight = (workers or os.cpu_count() or 1) * 4
+    processed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        queue = iter(new_detections)
+        while True:
+            while len(pending) < max_in_flight:
+                item = next(queue, None)
+                if item is None:
+                    break
+                future = executor.submit(make_thumbnail, item[0], cache_dir, thumb_size)
+                pending[future] = item
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, timestamp, score = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Skipping {path}: {e}")
+                    continue
+                if result['thumb'] is None:
+                    # Unreadable, e.g. still being copied: not marked as processed, retried next run
+                    print(f"Skipping unreadable image: {path}")
+                    continue
+
+                flight_id, index = assign_segment(state['flights'], timestamp, segment_seconds)
+                key = f"{flight_id}/{index:03d}"
+                update_segment(state['segments'], key, flight_id, index, timestamp, score)
+
+                state['detections'].append({
+                    'image': path,
+                    'timestamp': timestamp,
+                    'score': score,
+                    'segment': key,
+                    'hash': result['hash'],
+                    'thumb': result['thumb'],
+                    'crop': result['crop'],
+                })
+                state['processed'][path] = result['hash']
+
+                processed += 1
+                if processed % 100 == 0:
+                    print(f"Processed {processed}/{len(new_detections)} images...")
+
+    rows = summarize_segments(state['segments'])
+    write_json(state_path, state)
+    write_json(os.path.join(output_dir, 'report.json'), {
+        'generated': int(time.time()),
+        'segment_seconds': segment_seconds,
+        'flights': state['flights'],
+        'segments': rows,
+        'detections': state['detections'],
+    })
+    write_html(os.path.join(output_dir, 'index.html'), state, rows, output_dir)
+
+    print(f"\nReport updated: {processed} new images, {len(state['detections'])} total")
+    print(f"Report saved to: {os.path.join(output_dir, 'index.html')}")
+    return rows
+
+
+if __name__ == "__main__":
+    # Configuration
+    FLIGHT_DIRS = ['../video/flights']  # Folders copied from /home/tpu/Videos/ after each flight
+    OUTPUT_DIR = '../video/report'
+    SEGMENT_SECONDS = 30  # Length of one road segment in flight time
+    WORKERS = None  # Process pool size (None = number of CPU cores)
+
+    build_report(FLIGHT_DIRS, OUTPUT_DIR, SEGMENT_SECONDS, WORKERS)
@@ -0,0 +1,115 @@
+from ultralytics import YOLO
+import cv2
+import json
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Add parent directory to path to import utilities
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utilities.utils import get_device
+from pack_dataset import letterbox
+from shard_dataset import ShardDataset, shard_trainer
+
+
+def decode_rate(image_files, imgsz):
+    """Images/s when every image is decoded from JPEG (training without cache)."""
+    start = time.perf_counter()
+    for image_file in image_files:
+        image = cv2.imread(image_file)
+        letterbox(image, imgsz)
+    return len(image_files) / (time.perf_counter() - start)
+
+
+def shard_rate(shard_split_dir, imgsz, count):
+    """Images/s when reading letterboxed images from the memory-mapped shards."""
+    dataset = ShardDataset(img_path=shard_split_dir, imgsz=imgsz, augment=False, cache=False,
+                           data={'names': {0: 'pothole'}})
+    start = time.perf_counter()
+    for i in range(count):
+        dataset.load_image(i)
+    return count / (time.perf_counter() - start)
+
+
+def epoch_time(yaml_path, device, trainer=None, cache=False):
+    """
+    Wall time of one training epoch (including validation).
+
+    Returns:
+        tuple: (seconds, number of training images)
+    """
+    model = YOLO('yolov8n.pt')
+    start = time.perf_counter()
+    model.train(
+        trainer=trainer,
+        data=yaml_path,
+        epochs=1,
+        imgsz=640,
+        batch=16,
+        project='./runs/benchmark',
+        name='loader',
+        exist_ok=True,
+        device=device,
+        workers=2 if device == 0 else 0,
+        cache=cache,
+        plots=False,
+        verbose=False,
+    )
+    return time.perf_counter() - start, len(model.trainer.train_loader.dataset)
+
+
+def benchmark_loader(yaml_path, shard_dir, device, max_images=500, run_epochs=False):
+    """
+    Compare JPEG decoding against packed shards: images/s and optionally epoch time.
+
+    The 'before' epoch runs like train.py without shards: cache='disk', with the
+    .npy cache written by an untimed warm-up epoch first. Dedup makes the shard
+    epoch smaller, so the image count of each run is reported as well.
+    """
+    split_dir = os.path.join(shard_dir, 'train')
+    with open(os.path.join(split_dir, 'index.json'), 'r') as f:
+        index = json.load(f)
+    image_files = [image['file'] for image in index['images']][:max_images]
+    imgsz = index['imgsz']
+
+    # Warm-up run (imports, first page faults)
+    decode_rate(image_files[:50], imgsz)
+    shard_rate(split_dir, imgsz, min(50, len(image_files)))
+
+    jpeg = decode_rate(image_files, imgsz)
+    shards = shard_rate(split_dir, imgsz, len(image_files))
+
+    print(f"\n{'=' * 60}")
+    print("DATA LOADING BENCHMARK")
+    print(f"{'=' * 60}")
+    print(f"Images: {len(image_files)} ({len(index['removed'])} near-duplicates removed when packing)")
+    print(f"{'':24}{'JPEG decode':>16}{'Shards':>16}")
+    print(f"{'Images/s':24}{jpeg:>16.1f}{shards:>16.1f}")
+
+    if run_epochs:
+        epoch_time(yaml_path, device, cache='disk')  # Writes the .npy cache
+        before, before_images = epoch_time(yaml_path, device, cache='disk')
+        after, after_images = epoch_time(yaml_path, device, trainer=shard_trainer(shard_dir))
+        print(f"{'':24}{'Disk cache':>16}{'Shards':>16}")
+        print(f"{'Epoch images':24}{before_images:>16}{after_images:>16}")
+        print(f"{'Epoch time (s)':24}{before:>16.1f}{after:>16.1f}")
+        print(f"{'Epoch images/s':24}{before_images / before:>16.1f}{after_images / after:>16.1f}")
+
+    print(f"Decode speedup: {shards / jpeg:.1f}x")
+    print(f"{'=' * 60}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    # Configuration
+    DATA_YAML = '../dataset/data.yaml'
+    SHARD_DIR = '../dataset_shards'
+    MAX_IMAGES = 500  # Images used for the images/s measurement
+    RUN_EPOCHS = True  # Also time one training epoch with and without shards
+
+    # Get device
+    device, device_name = get_device()
+
+    benchmark_loader(DATA_YAML, SHARD_DIR, device, MAX_IMAGES, RUN_EPOCHS)
@@ -0,0 +1,286 @@
+import cv2
+import json
+import numpy as np
+import os
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+
+IMG_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+PAD_COLOR = (114, 114, 114)  # Same padding value as Ultralytics LetterBox
+
+
+def resolve_split_dir(yaml_path, split_path):
+    """
+    Resolve an image folder from data.yaml. Roboflow exports use paths like
+    '../train/images' that are relative to the export folder's parent.
+    """
+    base = os.path.dirname(os.path.abspath(yaml_path))
+    candidates = [os.path.join(base, split_path)]
+    if split_path.startswith('../'):
+        candidates.append(os.path.join(base, split_path[3:]))
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            return os.path.normpath(candidate)
+    return None
+
+
+def label_path_for(image_path):
+    """YOLO convention: .../images/name.jpg -> .../labels/name.txt"""
+    root, _ = os.path.splitext(image_path)
+    sep = os.sep
+    return root.replace(f"{sep}images{sep}", f"{sep}labels{sep}") + '.txt'
+
+
+def read_labels(label_path):
+    """
+    Read a YOLO label file as (cls, [cx, cy, w, h]) tuples. Polygon labels are
+    converted to their bounding box.
+    """
+    labels = []
+    if not os.path.exists(label_path):
+        return labels
+    with open(label_path, 'r') as f:
+        for line in f:
+            values = line.split()
+            if len(values) < 5:
+                continue
+            cls = int(float(values[0]))
+            coords = [float(v) for v in values[1:]]
+            if len(coords) > 4:
+                xs, ys = coords[0::2], coords[1::2]
+                x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+                coords = [(x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0]
+            labels.append((cls, coords))
+    return labels
+
+
+def dhash(image, hash_size=8):
+    """64-bit difference hash of a BGR image."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+def letterbox(image, imgsz):
+    """
+    Resize the long side to imgsz and pad to a square.
+
+    Returns:
+        tuple: (image, ratio, (pad_x, pad_y))
+    """
+    h, w = image.shape[:2]
+    r = imgsz / max(h, w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    if (new_w, new_h) != (w, h):
+        interpolation = cv2.INTER_AREA if r < 1 else cv2.INTER_LINEAR
+        image = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    image = cv2.copyMakeBorder(image, pad_y, imgsz - new_h - pad_y, pad_x, imgsz - new_w - pad_x,
+                               cv2.BORDER_CONSTANT, value=PAD_COLOR)
+    return image, r, (pad_x, pad_y)
+
+
+def load_sample(image_path, imgsz):
+    """
+    Decode, hash and letterbox one image (runs in a worker process).
+
+    Returns:
+        tuple: (letterboxed image or None, dhash, original (h, w), labels in letterboxed coordinates)
+    """
+    image = cv2.imread(image_path)
+    if image is None:
+        return None, None, None, None
+    h, w = image.shape[:2]
+    image_hash = dhash(image)
+    boxed, r, (pad_x, pad_y) = letterbox(image, imgsz)
+
+    labels = []
+    for cls, (cx, cy, bw, bh) in read_labels(label_path_for(image_path)):
+        labels.append((cls, [
+            (cx * w * r + pad_x) / imgsz,
+            (cy * h * r + pad_y) / imgsz,
+            bw * w * r / imgsz,
+            bh * h * r / imgsz,
+        ]))
+    return boxed, image_hash, (h, w), labels
+
+
+class NearDuplicateIndex:
+    """
+    Finds hashes within max_distance bits of an already kept hash.
+
+    The 64 bits are split into max_distance + 1 bands: two hashes that differ in
+    at most max_distance bits agree on at least one band, so only hashes sharing
+    a band have to be compared.
+    """
+
+    def __init__(self, max_distance, bits=64):
+        self.max_distance = max_distance
+        n_bands = max_distance + 1
+        edges = [round(i * bits / n_bands) for i in range(n_bands + 1)]
+        self.bands = list(zip(edges[:-1], edges[1:]))
+        self.buckets = [{} for _ in self.bands]
+
+    def _keys(self, value):
+        return [(value >> lo) & ((1 << (hi - lo)) - 1) for lo, hi in self.bands]
+
+    def find(self, value):
+        """Return the id of a near-duplicate, or None."""
+        for bucket, key in zip(self.buckets, self._keys(value)):
+            for other, item_id in bucket.get(key, []):
+                if bin(value ^ other).count('1') <= self.max_distance:
+                    return item_id
+        return None
+
+    def add(self, value, item_id):
+        for bucket, key in zip(self.buckets, self._keys(value)):
+            bucket.setdefault(key, []).append((value, item_id))
+
+
+def pack_split(image_dir, output_dir, imgsz, shard_size, dedup_distance, workers):
+    """
+    Pack one split into raw uint8 shards plus an index.json with the labels.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    image_paths = sorted(
+        os.path.join(image_dir, name) for name in os.listdir(image_dir)
+        if name.lower().endswith(IMG_EXTENSIONS)
+    )
+    dedup = NearDuplicateIndex(dedup_distance) if dedup_distance is not None else None
+
+    index = {'imgsz': imgsz, 'source': image_dir, 'shards': [], 'images': [], 'removed': [], 'skipped': []}
+    shard_file = None
+
+    def open_shard():
+        name = f"shard_{len(index['shards']):03d}.bin"
+        index['shards'].append({'file': name, 'count': 0})
+        return open(os.path.join(output_dir, name), 'wb')
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        samples = executor.map(load_sample, image_paths, [imgsz] * len(image_paths), chunksize=16)
+        for image_path, (image, image_hash, shape, labels) in zip(image_paths, samples):
+            if image is None:
+                print(f"Skipping unreadable image: {image_path}")
+                index['skipped'].append(image_path)
+                continue
+
+            if dedup is not None:
+                duplicate_of = dedup.find(image_hash)
+                if duplicate_of is not None:
+                    index['removed'].append({'file': image_path, 'duplicate_of': duplicate_of})
+                    continue
+                dedup.add(image_hash, image_path)
+
+            if shard_file is None or index['shards'][-1]['count'] == shard_size:
+                if shard_file is not None:
+                    shard_file.close()
+                shard_file = open_shard()
+            shard = index['shards'][-1]
+            shard_file.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+
+            index['images'].append({
+                'file': image_path,
+                'shard': len(index['shards']) - 1,
+                'offset': shard['count'],
+                'orig_shape': list(shape),
+                'cls': [cls for cls, _ in labels],
+                'bboxes': [box for _, box in labels],
+            })
+            shard['count'] += 1
+
+            if len(index['images']) % 500 == 0:
+                print(f"Packed {len(index['images'])} images...")
+
+    if shard_file is not None:
+        shard_file.close()
+
+    with open(os.path.join(output_dir, 'index.json'), 'w') as f:
+        json.dump(index, f)
+    return index
+
+
+def check_shards(shard_dir, dataset_dir, imgsz):
+    """
+    Check that packed shards still match the dataset and image size used for training.
+
+    Returns:
+        str: Why the shards cannot be used, or None if they match
+    """
+    dataset_dir = os.path.abspath(dataset_dir)
+    found = False
+    for split in ('train', 'val', 'test'):
+        index_path = os.path.join(shard_dir, split, 'index.json')
+        if not os.path.exists(index_path):
+            continue
+        found = True
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+
+        if index.get('imgsz') != imgsz:
+            return f"{split} was packed at imgsz={index.get('imgsz')}, training uses imgsz={imgsz}"
+        source = os.path.abspath(index.get('source', ''))
+        if os.path.commonpath([source, dataset_dir]) != dataset_dir:
+            return f"{split} was packed from {source}, not from {dataset_dir}"
+        if not os.path.isdir(source):
+            return f"{split} source folder {source} no longer exists"
+
+        current = sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(IMG_EXTENSIONS)
+        )
+        packed = sorted(
+            [image['file'] for image in index['images']]
+            + [removed['file'] for removed in index['removed']]
+            + index.get('skipped', [])
+        )
+        if current != packed:
+            return f"{split} images changed since packing ({len(current)} now, {len(packed)} packed)"
+
+    if not found:
+        return f"no packed dataset in {shard_dir}"
+    return None
+
+
+def pack_dataset(data_yaml, output_dir, imgsz=640, shard_size=512, dedup_distance=4, workers=None):
+    """
+    Decode and letterbox a YOLO dataset once into memory-mapped shards.
+
+    Near-duplicates (dHash distance <= dedup_distance) are only removed from the
+    training split, so validation metrics stay comparable.
+    """
+    with open(data_yaml, 'r') as f:
+        data = yaml.safe_load(f)
+
+    print(f"Packing dataset {data_yaml} into {output_dir} ({imgsz}x{imgsz})")
+    summary = {}
+    for split, key in (('train', 'train'), ('val', 'val'), ('test', 'test')):
+        if not data.get(key):
+            continue
+        image_dir = resolve_split_dir(data_yaml, data[key])
+        if image_dir is None:
+            print(f"Skipping {split}: folder not found for '{data[key]}'")
+            continue
+        index = pack_split(image_dir, os.path.join(output_dir, split), imgsz, shard_size,
+                           dedup_distance if split == 'train' else None, workers)
+        summary[split] = (len(index['images']), len(index['removed']))
+
+    print(f"\n{'=' * 60}")
+    print("PACKING COMPLETE")
+    print(f"{'=' * 60}")
+    for split, (kept, removed) in summary.items():
+        print(f"{split:6}: {kept} images packed, {removed} near-duplicates removed")
+    print(f"Shards saved to: {output_dir}")
+    print(f"{'=' * 60}")
+    return summary
+
+
+if __name__ == "__main__":
+    # Configuration
+    DATA_YAML = '../dataset/data.yaml'
+    SHARD_DIR = '../dataset_shards'
+    IMG_SIZE = 640  # Must match IMG_SIZE in train.py
+    SHARD_SIZE = 512  # Images per shard (~600 MB at 640x640)
+    DEDUP_DISTANCE = 4  # Max dHash bit difference for near-duplicates (None = keep all)
+
+    pack_dataset(DATA_YAML, SHARD_DIR, IMG_SIZE, SHARD_SIZE, DEDUP_DISTANCE)
@@ -0,0 +1,107 @@
+import json
+import numpy as np
+import os
+from ultralytics.data.dataset import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+
+
+class ShardDataset(YOLODataset):
+    """
+    YOLODataset reading pre-letterboxed images from shards written by pack_dataset.py.
+
+    img_path is a split folder of the packed dataset (e.g. dataset_shards/train).
+    Images are memory-mapped, so nothing is decoded during training and the OS
+    page cache is shared between dataloader workers.
+    """
+
+    def get_img_files(self, img_path):
+        with open(os.path.join(img_path, 'index.json'), 'r') as f:
+            self.shard_index = json.load(f)
+        self.shard_dir = img_path
+        self._shards = None
+        return [image['file'] for image in self.shard_index['images']]
+
+    def get_labels(self):
+        imgsz = self.shard_index['imgsz']
+        labels = []
+        for image in self.shard_index['images']:
+            labels.append({
+                'im_file': image['file'],
+                'shape': (imgsz, imgsz),
+                'cls': np.array(image['cls'], dtype=np.float32).reshape(-1, 1),
+                'bboxes': np.array(image['bboxes'], dtype=np.float32).reshape(-1, 4),
+                'segments': [],
+                'keypoints': None,
+                'normalized': True,
+                'bbox_format': 'xywh',
+            })
+        return labels
+
+    def _open_shards(self):
+        imgsz = self.shard_index['imgsz']
+        self._shards = [
+            np.memmap(os.path.join(self.shard_dir, shard['file']), dtype=np.uint8, mode='r',
+                      shape=(shard['count'], imgsz, imgsz, 3))
+            for shard in self.shard_index['shards']
+        ]
+
+    def load_image(self, i, rect_mode=True):
+        if self._shards is None:
+            self._open_shards()
+        image = self.shard_index['images'][i]
+        # Copy: augmentations modify the image in place
+        im = np.array(self._shards[image['shard']][image['offset']])
+
+        # Keep the mosaic buffer behaviour of BaseDataset.load_image
+        if self.augment:
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                self.buffer.pop(0)
+
+        return im, im.shape[:2], im.shape[:2]
+
+    def __getstate__(self):
+        # Dataloader workers re-open the memory maps instead of pickling them
+        state = self.__dict__.copy()
+        state['_shards'] = None
+        return state
+
+
+class ShardTrainer(DetectionTrainer):
+    """
+    DetectionTrainer that builds its datasets from packed shards.
+
+    Use shard_trainer(shard_dir) to get a trainer class for model.train(trainer=...).
+    """
+
+    shard_dir = '../dataset_shards'
+
+    def build_dataset(self, img_path, mode='train', batch=None):
+        model = getattr(self.model, 'module', self.model)
+        stride = max(int(model.stride.max() if model else 0), 32)
+        split = 'train' if mode == 'train' else 'val'
+        return ShardDataset(
+            img_path=os.path.join(self.shard_dir, split),
+            imgsz=self.args.imgsz,
+            batch_size=batch,
+            augment=mode == 'train',
+            hyp=self.args,
+            rect=self.args.rect or mode == 'val',
+            cache=False,
+            single_cls=self.args.single_cls or False,
+            stride=stride,
+            pad=0.0 if mode == 'train' else 0.5,
+            prefix=colorstr(f"{mode}: "),
+            task=self.args.task,
+            classes=self.args.classes,
+            data=self.data,
+            fraction=self.args.fraction if mode == 'train' else 1.0,
+        )
+
+
+def shard_trainer(shard_dir):
+    """
+    Trainer class reading from the given packed dataset folder.
+    """
+    return type('ShardTrainer', (ShardTrainer,), {'shard_dir': os.path.abspath(shard_dir)})
@@ -8,6 +8,8 @@ from dotenv import load_dotenv
 # Add parent directory to path to import utilities
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utilities.utils import get_device, update_yaml_classes
+from shard_dataset import shard_trainer
+from pack_dataset import check_shards
 
 if __name__ == "__main__":
     # Load environment variables from .env file
@@ -21,6 +23,8 @@ if __name__ == "__main__":
     PROJECT_NAME = os.getenv('ROBOFLOW_PROJECT_NAME') or PROJECT
     VERSION = os.getenv('ROBOFLOW_PROJECT_VERSION')
     yaml_path = f'{DATASET_DIR}/data.yaml'
+    SHARD_DIR = '../dataset_shards'  # Created by pack_dataset.py (optional)
+    IMG_SIZE = 640
 
     # Validate env
     missing = []
@@ -52,6 +56,19 @@ if __name__ == "__main__":
     # Rename classes
     #update_yaml_classes(yaml_path, ['light', 'medium', 'severe'])
 
+    # Use packed shards if available and up to date (no JPEG decoding during training)
+    trainer = None
+    cache = 'disk'
+    if os.path.exists(SHARD_DIR):
+        shard_problem = check_shards(SHARD_DIR, DATASET_DIR, IMG_SIZE)
+        if shard_problem is None:
+            print(f"Using packed dataset shards from {SHARD_DIR}")
+            trainer = shard_trainer(SHARD_DIR)
+            cache = False
+        else:
+            print(f"Warning: not using shards in {SHARD_DIR} ({shard_problem}). "
+                  f"Run pack_dataset.py again to use them.")
+
     # Load model
     print("Loading YOLOv8n model...")
     model = YOLO('yolov8n.pt')
@@ -60,9 +77,10 @@ if __name__ == "__main__":
     print(f"Starting training on {device_name}...")
 
     results = model.train(
+        trainer=trainer,
         data=yaml_path,
         epochs=300,
-        imgsz=640,
+        imgsz=IMG_SIZE,
         batch=16,
         name=PROJECT_NAME,
         project='./runs/detect',
@@ -70,7 +88,7 @@ if __name__ == "__main__":
         save=True,
         device=device,
         workers=2 if device == 0 else 0,
-        cache='disk',
+        cache=cache,
         amp=True if device == 0 else False,
         # Core hyperparameters (all officially supported in YOLOv8)
         lr0=0.01,  # Initial learning rate
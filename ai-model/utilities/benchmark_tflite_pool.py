@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Add parent directory to path to import utilities
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utilities.tflite_pool import TFLitePool, prepare_frame
+
+
+def load_frames(video_path, input_width, input_height, max_frames):
+    """
+    Decode and scale frames once, so the benchmark only measures inference.
+    """
+    frames = []
+    cap = cv2.VideoCapture(video_path)
+    while cap.isOpened() and len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(prepare_frame(frame, input_width, input_height))
+    cap.release()
+
+    if not frames:
+        print(f"No frames read from {video_path}, using random frames")
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (input_height, input_width, 3), dtype=np.uint8)
+                  for _ in range(max_frames)]
+    return frames
+
+
+def benchmark_pool(model_path, video_path, max_workers, num_threads=1, mode='thread', max_frames=300):
+    """
+    Measure throughput of the interpreter pool for 1..max_workers workers.
+
+    The outputs of every run are compared against a single-worker run on the same
+    backend (a Coral is only used with one worker), so the benchmark also confirms
+    that parallel inference does not change results.
+    """
+    references = {}
+    with TFLitePool(model_path, workers=1, num_threads=num_threads, mode=mode) as pool:
+        frames = load_frames(video_path, pool.input_width, pool.input_height, max_frames)
+        references[pool.backend] = list(pool.infer(frames))
+
+    print(f"\n{'=' * 60}")
+    print(f"TFLITE POOL BENCHMARK ({mode} mode, {num_threads} thread(s) per interpreter)")
+    print(f"{'=' * 60}")
+    print(f"Model: {model_path}")
+    print(f"Frames: {len(frames)}")
+    print(f"{'Workers':>8} {'Backend':>9} {'FPS':>8} {'Speedup':>8} {'Identical':>10}")
+
+    results = []
+    base_fps = None
+    for workers in range(1, max_workers + 1):
+        with TFLitePool(model_path, workers=workers, num_threads=num_threads, mode=mode) as pool:
+            start = time.perf_counter()
+            outputs = list(pool.infer(frames))
+            elapsed = time.perf_counter() - start
+            backend = pool.backend
+
+        if backend not in references:
+            with TFLitePool(model_path, workers=1, num_threads=num_threads, mode=mode,
+                            use_edgetpu=backend == 'edgetpu') as pool:
+                references[backend] = list(pool.infer(frames))
+
+        fps = len(frames) / elapsed
+        base_fps = base_fps or fps
+        identical = all(np.array_equal(a, b) for a, b in zip(outputs, references[backend]))
+        results.append((workers, fps))
+        print(f"{workers:>8} {backend:>9} {fps:>8.1f} {fps / base_fps:>7.2f}x {str(identical):>10}")
+
+    print(f"{'=' * 60}")
+    return results
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    # Configuration
+    PROJECT = os.getenv('ROBOFLOW_PROJECT')
+    PROJECT_NAME = os.getenv('ROBOFLOW_PROJECT_NAME') or PROJECT
+    MODEL_PATH = f'../train/runs/detect/{PROJECT_NAME}/weights/best_saved_model/best_int8.tflite'
+    VIDEO_PATH = '../video/1.mp4'
+    MAX_WORKERS = os.cpu_count() or 1
+    NUM_THREADS = 1  # Threads per interpreter (XNNPACK)
+    MODE = 'thread'  # 'thread' or 'process'
+
+    benchmark_pool(MODEL_PATH, VIDEO_PATH, MAX_WORKERS, NUM_THREADS, MODE)
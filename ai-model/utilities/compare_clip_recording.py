@@ -0,0 +1,197 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add parent directory and repository root to path to import utilities and the drone code
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from utilities.tflite_pool import TFLitePool, infer_video
+from utilities.inference_cache import InferenceCache
+from drone_inference import yolo_postprocess
+from clip_recorder import plan_clips
+
+NAL_IDR = 5
+NAL_SLICE = 1
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_SEI = 6
+NAL_AUD = 9
+
+
+def iter_nal_units(path, chunk_size=1 << 20):
+    """
+    Stream (offset, nal_type, first_byte_after_header) for every NAL unit of an
+    H264 Annex-B file without loading it into memory. Ends with (file_size, None, None).
+    """
+    base = 0
+    data = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            data += chunk
+            pos = data.find(b'\x00\x00\x01')
+            while pos != -1 and pos + 4 < len(data):
+                yield base + pos, data[pos + 3] & 0x1F, data[pos + 4]
+                pos = data.find(b'\x00\x00\x01', pos + 3)
+            if not chunk:
+                break
+            # Keep an incomplete start code for the next chunk
+            cut = pos if pos != -1 else max(len(data) - 2, 0)
+            base += cut
+            data = data[cut:]
+    yield base + len(data), None, None
+
+
+def parse_h264_frames(path):
+    """
+    Split an H264 elementary stream into frames.
+
+    The Raspberry Pi encoder writes one slice per frame; parameter sets and
+    other non-slice NAL units are counted with the frame that follows them.
+
+    Returns:
+        list: (start_offset, end_offset, is_keyframe) per frame
+    """
+    frames = []
+    frame_start = 0
+    frame_keyframe = False
+    frame_has_slice = False
+    for offset, nal_type, first_byte in iter_nal_units(path):
+        new_frame = nal_type in (NAL_IDR, NAL_SLICE) and first_byte & 0x80  # first_mb_in_slice == 0
+        if frame_has_slice and (nal_type is None or new_frame or nal_type in (NAL_SEI, NAL_SPS, NAL_PPS, NAL_AUD)):
+            frames.append((frame_start, offset, frame_keyframe))
+            frame_start = offset
+            frame_keyframe = False
+            frame_has_slice = False
+        if nal_type in (NAL_IDR, NAL_SLICE):
+            frame_has_slice = True
+            frame_keyframe = frame_keyframe or nal_type == NAL_IDR
+    return frames
+
+
+def detect_frames(pool, video_path, conf, nms, cache=None, frame_count=None):
+    """
+    Replay the recording through the drone's detector.
+
+    Returns:
+        list: Indices of frames with at least one detection
+    """
+    hits = []
+    for processed, (index, output) in enumerate(infer_video(pool, video_path, cache, frame_count), 1):
+        _, _, scores = yolo_postprocess(output, conf, nms, pool.input_width, pool.input_height)
+        if len(scores) > 0:
+            hits.append(index)
+        if processed % 300 == 0:
+            print(f"Processed {processed} frames, {len(hits)} with detections...")
+    return sorted(hits)
+
+
+def clip_frame_ranges(frames, clips, fps):
+    """
+    Convert clip intervals to the frame ranges CircularOutput actually writes:
+    nothing is written before the first keyframe at or after the pre-roll start.
+    """
+    ranges = []
+    for start, end in clips:
+        first = int(start * fps)
+        last = min(int(end * fps), len(frames))
+        while first < last and not frames[first][2]:
+            first += 1
+        if first < last:
+            ranges.append((first, last))
+    return ranges
+
+
+def write_clips(video_path, frames, ranges, output_dir):
+    """
+    Cut the clips out of the recording by byte range, e.g. to check pre/post roll visually.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    with open(video_path, 'rb') as f:
+        for i, (first, last) in enumerate(ranges):
+            start, end = frames[first][0], frames[last - 1][1]
+            f.seek(start)
+            clip_path = os.path.join(output_dir, f"{name}_clip{i:03d}.h264")
+            with open(clip_path, 'wb') as out:
+                out.write(f.read(end - start))
+            print(f"Saved: {clip_path}")
+
+
+def compare_recording_modes(model_path, video_path, fps=30, pre_roll=5.0, post_roll=5.0,
+                            conf=0.5, nms=0.4, workers=1, clip_dir=None, cache_dir=None):
+    """
+    Compare storage and write throughput of continuous recording against
+    detection-triggered clips on a replayed flight recording.
+
+    With cache_dir set, the model's candidate boxes are cached, so re-running with
+    other thresholds or pre/post roll skips decoding and inference.
+    """
+    print(f"Parsing H264 stream: {video_path}")
+    frames = parse_h264_frames(video_path)
+    if not frames:
+        print(f"Error: No H264 frames found in {video_path}")
+        return None
+    keyframes = sum(1 for f in frames if f[2])
+    print(f"Frames: {len(frames)}, keyframes: {keyframes}")
+
+    print(f"Running detection with {workers} worker(s)...")
+    cache = InferenceCache(cache_dir) if cache_dir else None
+    with TFLitePool(model_path, workers=workers) as pool:
+        hits = detect_frames(pool, video_path, conf, nms, cache, len(frames))
+    if cache is not None:
+        print(f"Inference cache: {cache.stats()}")
+
+    clips = plan_clips([i / fps for i in hits], pre_roll, post_roll)
+    ranges = clip_frame_ranges(frames, clips, fps)
+
+    duration = len(frames) / fps
+    continuous_bytes = frames[-1][1] - frames[0][0]
+    clip_bytes = sum(frames[last - 1][1] - frames[first][0] for first, last in ranges)
+    clip_seconds = sum((last - first) / fps for first, last in ranges)
+    peak_rate = max(((frames[last - 1][1] - frames[first][0]) / ((last - first) / fps)
+                     for first, last in ranges), default=0.0)
+
+    print(f"\n{'=' * 60}")
+    print("RECORDING MODE COMPARISON")
+    print(f"{'=' * 60}")
+    print(f"Flight duration:      {duration:.1f} s")
+    print(f"Frames with detections: {len(hits)}")
+    print(f"Clips (pre {pre_roll:.0f}s / post {post_roll:.0f}s): {len(clips)}, {clip_seconds:.1f} s recorded")
+    print(f"{'':22}{'Continuous':>14}{'Clips':>14}")
+    print(f"{'Storage (MB)':22}{continuous_bytes / 1e6:>14.1f}{clip_bytes / 1e6:>14.1f}")
+    print(f"{'Avg write (MB/s)':22}{continuous_bytes / duration / 1e6:>14.2f}{clip_bytes / duration / 1e6:>14.2f}")
+    print(f"{'Peak write (MB/s)':22}{continuous_bytes / duration / 1e6:>14.2f}{peak_rate / 1e6:>14.2f}")
+    if continuous_bytes:
+        print(f"Storage saved: {(1 - clip_bytes / continuous_bytes) * 100:.1f}%")
+    print(f"{'=' * 60}")
+
+    if clip_dir:
+        write_clips(video_path, frames, ranges, clip_dir)
+
+    return {
+        'continuous_bytes': continuous_bytes,
+        'clip_bytes': clip_bytes,
+        'clips': clips,
+        'duration': duration,
+    }
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    # Configuration
+    PROJECT = os.getenv('ROBOFLOW_PROJECT')
+    PROJECT_NAME = os.getenv('ROBOFLOW_PROJECT_NAME') or PROJECT
+    MODEL_PATH = f'../train/runs/detect/{PROJECT_NAME}/weights/best_saved_model/best_int8.tflite'
+    VIDEO_PATH = '../video/flight.h264'  # Continuous recording copied from the drone
+    FPS = 30  # Frame rate of the recording (raw H264 has no timestamps)
+    PRE_ROLL_SECONDS = 5
+    POST_ROLL_SECONDS = 5
+    CONFIDENCE = 0.5  # Same as CONFIDENCE_THRESHOLD in camera_control.py
+    WORKERS = os.cpu_count() or 1
+    CLIP_DIR = None  # Set to a folder to also write the clips
+    CACHE_DIR = '../video/.inference_cache'  # None to disable the inference cache
+
+    compare_recording_modes(MODEL_PATH, VIDEO_PATH, FPS, PRE_ROLL_SECONDS, POST_ROLL_SECONDS,
+                            CONFIDENCE, 0.4, WORKERS, CLIP_DIR, CACHE_DIR)
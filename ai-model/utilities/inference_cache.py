@@ -0,0 +1,124 @@
+import hashlib
+import io
+import numpy as np
+import os
+
+# Predictions are cached down to this score, so any higher conf can be applied
+# later: the Ultralytics conf in detect_video.py, the best class score of each
+# anchor in tflite_pool.infer_video(). Part of the cache keys of both.
+CACHE_CONF_FLOOR = 0.01
+
+_digest_memo = {}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Content hash of a model or video file. Remembered per (path, size, mtime),
+    so a file is only read once per process.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    if memo_key not in _digest_memo:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        _digest_memo[memo_key] = digest.hexdigest()
+    return _digest_memo[memo_key]
+
+
+class InferenceCache:
+    """
+    Content-addressed on-disk cache for raw (pre-threshold) model predictions.
+
+    Entries are keyed by (model hash, frame key, input size) and stored as
+    compressed .npz files. When the cache grows beyond max_bytes, the least
+    recently used entries are removed; a hit refreshes the entry's mtime.
+
+    Args:
+        cache_dir (str): Cache folder
+        max_bytes (int): Size limit of the cache folder
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def make_key(model_hash, frame_key, input_size):
+        """Cache key for one frame, e.g. frame_key = f"{video_hash}:{frame_index}"."""
+        size = 'x'.join(str(s) for s in input_size) if isinstance(input_size, (tuple, list)) else str(input_size)
+        return hashlib.sha1(f"{model_hash}|{frame_key}|{size}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npz")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npz'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield stat.st_mtime, path, stat.st_size
+
+    def get(self, key):
+        """
+        Returns:
+            dict: Stored arrays, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        if os.path.exists(path):
+            self.total_bytes -= os.path.getsize(path)
+        os.replace(tmp_path, path)
+        self.total_bytes += len(buffer.getvalue())
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_ratio=0.9):
+        """Remove least recently used entries until the cache is below target_ratio * max_bytes."""
+        entries = sorted(self._entries())
+        self.total_bytes = sum(size for _, _, size in entries)
+        target = self.max_bytes * target_ratio
+        removed = 0
+        for _, path, size in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+            removed += 1
+        if removed:
+            print(f"Inference cache: evicted {removed} entries ({self.total_bytes / 1024 ** 2:.0f} MB left)")
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), {self.total_bytes / 1024 ** 2:.1f} MB"
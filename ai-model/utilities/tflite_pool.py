@@ -0,0 +1,296 @@
+import cv2
+import multiprocessing
+import numpy as np
+import os
+import queue
+import sys
+import threading
+
+# Add parent directory and repository root to path to import utilities and the drone's inference code
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from drone_inference import load_interpreter, invoke, yolo_postprocess
+from utilities.inference_cache import CACHE_CONF_FLOOR, file_digest
+
+
+def prepare_frame(frame, input_width, input_height):
+    """
+    Scale a BGR video frame to the model input like the drone's lores stream (RGB, full field of view).
+    """
+    resized = cv2.resize(frame, (input_width, input_height), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+
+
+def compact_output(output, floor=CACHE_CONF_FLOOR):
+    """
+    Drop the anchors of a YOLOv8 output [1, 4 + classes, anchors] whose best class
+    score is not above floor. yolo_postprocess() gives the same detections for
+    any conf above floor, at a fraction of the size.
+    """
+    scores = np.max(output[0, 4:], axis=0)
+    return output[:, :, scores > floor]
+
+
+def infer_video(pool, video_path, cache=None, frame_count=None):
+    """
+    Model outputs for every frame of a video, optionally through an InferenceCache.
+
+    With a cache, only the candidates above CACHE_CONF_FLOOR are stored and
+    returned (see compact_output()), keyed by model and pool backend. Cached frames are read first and only the
+    missing frames are decoded and sent to the pool. The frame count is taken
+    from the container if not given; raw .h264 streams need frame_count for
+    cache lookups.
+
+    Yields:
+        tuple: (frame_index, output); cached frames first, so not strictly in order
+    """
+    missing = None
+    if cache is not None:
+        model_hash = file_digest(pool.model_path)
+        video_hash = file_digest(video_path)
+        input_size = (pool.input_width, pool.input_height)
+
+        def key(index):
+            return cache.make_key(f"{model_hash}:{pool.backend}", f"{video_hash}:{index}:floor{CACHE_CONF_FLOOR}",
+                                  input_size)
+
+        if not frame_count:
+            cap = cv2.VideoCapture(video_path)
+            frame_count = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+            cap.release()
+
+        if frame_count:
+            missing = []
+            for index in range(frame_count):
+                cached = cache.get(key(index))
+                if cached is None:
+                    missing.append(index)
+                else:
+                    yield index, cached['candidates']
+            if not missing:
+                return
+
+    wanted = set(missing) if missing is not None else None
+    indices = []
+
+    def frames():
+        cap = cv2.VideoCapture(video_path)
+        index = 0
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if wanted is None or index in wanted:
+                indices.append(index)
+                yield prepare_frame(frame, pool.input_width, pool.input_height)
+            index += 1
+        cap.release()
+
+    for i, output in enumerate(pool.infer(frames())):
+        if cache is not None:
+            output = compact_output(output)
+            cache.put(key(indices[i]), {'candidates': output})
+        yield indices[i], output
+
+
+def _worker_loop(worker_id, model_path, use_edgetpu, num_threads, in_queue, out_queue):
+    """
+    Worker body for both thread and process mode: one interpreter per worker,
+    fed from the shared work queue until it receives None.
+    """
+    try:
+        interpreter, on_edgetpu = load_interpreter(model_path, use_edgetpu, num_threads)
+    except Exception as e:
+        out_queue.put(('error', worker_id, f"Worker {worker_id} failed to load model: {e}"))
+        return
+    input_details = interpreter.get_input_details()
+    output_details = interpreter.get_output_details()
+    out_queue.put(('ready', worker_id, on_edgetpu))
+
+    while True:
+        item = in_queue.get()
+        if item is None:
+            break
+        index, image = item
+        try:
+            output = invoke(interpreter, input_details, output_details, image)
+            out_queue.put(('result', index, output))
+        except Exception as e:
+            out_queue.put(('error', index, f"Inference failed on item {index}: {e}"))
+
+
+class TFLitePool:
+    """
+    Pool of TFLite interpreters for offline inference on a many-core machine.
+
+    Every worker owns its own interpreter and takes frames from one shared work
+    queue. All workers run on the same backend, so results never depend on which
+    worker got a frame: the Edge TPU is only tried with a single worker (a Coral
+    can only serve one interpreter), and falls back to the CPU when no Coral is
+    attached. An _edgetpu.tflite model runs as its CPU twin on the CPU.
+
+    Args:
+        model_path (str): Path to the .tflite model (an _edgetpu.tflite model falls back to its CPU twin)
+        workers (int): Number of interpreters
+        num_threads (int): Threads per interpreter
+        mode (str): 'thread' or 'process'
+        use_edgetpu (bool): Try the Edge TPU delegate (single worker only)
+    """
+
+    def __init__(self, model_path, workers=1, num_threads=1, mode='thread', use_edgetpu=True):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool mode: {mode}")
+        if use_edgetpu and workers > 1:
+            print(f"Edge TPU serves one interpreter only, running all {workers} workers on the CPU")
+            use_edgetpu = False
+
+        # Read the input shape once in the parent
+        probe, _ = load_interpreter(model_path, use_edgetpu=False, num_threads=1)
+        input_details = probe.get_input_details()
+        _, self.input_height, self.input_width, _ = input_details[0]['shape']
+        del probe
+
+        if mode == 'thread':
+            self._in_queue = queue.Queue(maxsize=workers * 2)
+            self._out_queue = queue.Queue()
+            worker_cls = threading.Thread
+        else:
+            ctx = multiprocessing.get_context('spawn')
+            self._in_queue = ctx.Queue(maxsize=workers * 2)
+            self._out_queue = ctx.Queue()
+            worker_cls = ctx.Process
+
+        self._workers = []
+        for worker_id in range(workers):
+            worker = worker_cls(
+                target=_worker_loop,
+                args=(worker_id, model_path, use_edgetpu, num_threads,
+                      self._in_queue, self._out_queue),
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        # Wait until all interpreters are loaded so benchmarks only time inference
+        on_edgetpu = False
+        try:
+            for _ in range(workers):
+                kind, worker_id, payload = self._get_result()
+                if kind == 'error':
+                    raise RuntimeError(payload)
+                on_edgetpu = bool(payload)
+        except RuntimeError:
+            self.close()
+            raise
+        self.backend = 'edgetpu' if on_edgetpu else 'cpu'
+
+        self.model_path = model_path
+        self.mode = mode
+        self.workers = workers
+        self.num_threads = num_threads
+
+    def _check_workers(self):
+        for worker_id, worker in enumerate(self._workers):
+            if not worker.is_alive():
+                exitcode = getattr(worker, 'exitcode', None)
+                raise RuntimeError(f"Worker {worker_id} died (exit code {exitcode})")
+
+    def _get_result(self, timeout=0.5):
+        """Next item from the output queue; raises if a worker died instead of waiting forever."""
+        while True:
+            try:
+                return self._out_queue.get(timeout=timeout)
+            except queue.Empty:
+                self._check_workers()
+
+    def _feed(self, frames, stop, state):
+        try:
+            for image in frames:
+                while not stop.is_set():
+                    try:
+                        self._in_queue.put((state['fed'], image), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    break
+                state['fed'] += 1
+        except Exception as e:
+            state['error'] = e
+        finally:
+            state['done'] = True
+
+    def infer(self, frames):
+        """
+        Run the model on an iterable of RGB frames at model input size.
+
+        Frames are pulled lazily, so at most a few frames per worker are in memory.
+
+        Yields:
+            numpy.ndarray: Raw output tensor per frame, in input order
+        """
+        state = {'fed': 0, 'done': False, 'error': None}
+        stop = threading.Event()
+        feeder = threading.Thread(target=self._feed, args=(frames, stop, state), daemon=True)
+        feeder.start()
+
+        pending = {}
+        next_index = 0
+        received = 0
+        try:
+            while not (state['done'] and received == state['fed']):
+                try:
+                    kind, index, payload = self._out_queue.get(timeout=0.1)
+                except queue.Empty:
+                    self._check_workers()
+                    continue
+                received += 1
+                if kind == 'error':
+                    raise RuntimeError(payload)
+                pending[index] = payload
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+            if state['error'] is not None:
+                raise state['error']
+        finally:
+            # Drain work that is still in flight so the pool can be reused
+            stop.set()
+            feeder.join()
+            while received < state['fed']:
+                try:
+                    self._out_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if not all(worker.is_alive() for worker in self._workers):
+                        break
+                    continue
+                received += 1
+
+    def detect(self, frames, conf_thresh, nms_thresh):
+        """
+        Same as infer(), post-processed exactly like camera_control.py.
+
+        Yields:
+            tuple: (boxes, classes, scores) per frame
+        """
+        for output in self.infer(frames):
+            yield yolo_postprocess(output, conf_thresh, nms_thresh, self.input_width, self.input_height)
+
+    def close(self):
+        for worker in self._workers:
+            if worker.is_alive():
+                try:
+                    self._in_queue.put(None, timeout=1.0)
+                except queue.Full:
+                    pass
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+            if worker.is_alive() and hasattr(worker, 'terminate'):
+                worker.terminate()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
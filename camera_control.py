@@ -2,12 +2,14 @@ import time
 import signal
 import sys
 import os
+import json
 import uuid
 import serial
 import struct
 import cv2
-import numpy as np
-from tflite_runtime.interpreter import Interpreter, load_delegate
+from drone_inference import load_interpreter, invoke, yolo_postprocess
+from clip_recorder import ClipRecorder
+from thermal_governor import ThermalGovernor, SysfsThermalReader
 
 # --- IMPORT PICAMERA2 MODULES ---
 from picamera2 import Picamera2
@@ -22,6 +24,15 @@ AUX_CHANNEL_INDEX = 8
 TRIGGER_VALUE = 1500
 CONFIDENCE_THRESHOLD = 0.5
 NMS_THRESHOLD = 0.4
+# 'continuous': record the whole flight, 'clips': only record around detections
+RECORDING_MODE = 'continuous'
+PRE_ROLL_SECONDS = 5
+POST_ROLL_SECONDS = 5
+VIDEO_FPS = 30
+# Thermal governor: lowers inference rate and snapshot quality when the Pi heats up or throttles
+LATENCY_RATIO = 1.3  # Step down while warm when capture + inference is this much slower than when cool
+TEMP_HIGH = 75.0
+TEMP_LOW = 65.0
 
 # --- INITIALIZE SERIAL ---
 try:
@@ -33,20 +44,17 @@ except Exception as e:
 
 # --- INITIALIZE TFLITE ---
 try:
-    interpreter = Interpreter(
-        model_path=MODEL_PATH,
-        experimental_delegates=[load_delegate('libedgetpu.so.1')]
-    )
-    interpreter.allocate_tensors()
+    interpreter, on_edgetpu = load_interpreter(MODEL_PATH)
     input_details = interpreter.get_input_details()
     output_details = interpreter.get_output_details()
     _, input_height, input_width, _ = input_details[0]['shape']
     input_type = input_details[0]['dtype']
     
     print(f"Model Input: {input_width}x{input_height}, Dtype: {input_type}")
+    print(f"Inference on: {'Edge TPU' if on_edgetpu else 'CPU'}")
 
 except Exception as e:
-    print(f"Error loading Edge TPU model: {e}")
+    print(f"Error loading TFLite model: {e}")
     sys.exit(1)
 
 # --- INITIALIZE CAMERA ---
@@ -67,7 +75,14 @@ except Exception as e:
 # Global State
 recording = False
 current_filename = ""
-encoder = H264Encoder() 
+if RECORDING_MODE == 'clips':
+    # Every clip starts at a keyframe in the ring buffer: repeat SPS/PPS headers
+    # and keep keyframes closer together than the pre-roll
+    encoder = H264Encoder(repeat=True, iperiod=max(1, min(VIDEO_FPS, int(VIDEO_FPS * PRE_ROLL_SECONDS))))
+else:
+    encoder = H264Encoder()
+clip_recorder = ClipRecorder(picam2, encoder, VIDEO_PATH, PRE_ROLL_SECONDS, POST_ROLL_SECONDS, VIDEO_FPS)
+governor = None
 
 MSP_RC_REQUEST = b'$M<\x00\x69\x69'
 
@@ -92,68 +107,12 @@ def yuv420_to_rgb(yuv_frame, width, height):
     rgb = cv2.cvtColor(yuv, cv2.COLOR_YUV2RGB_I420)
     return rgb
 
-def yolo_postprocess(output_data, conf_thresh, nms_thresh):
-    """Parses YOLOv8 output: Shape [1, 12, 2100]"""
-    predictions = np.transpose(output_data[0])
-    scores = np.max(predictions[:, 4:], axis=1)
-    
-    keep_indices = np.where(scores > conf_thresh)[0]
-    predictions = predictions[keep_indices]
-    scores = scores[keep_indices]
-    
-    if len(scores) == 0:
-        return [], [], []
-
-    box_data = predictions[:, :4]
-    
-    boxes = []
-    for i in range(len(box_data)):
-        cx, cy, w, h = box_data[i]
-        x = int(cx - w/2)
-        y = int(cy - h/2)
-        width_box = int(w)
-        height_box = int(h)
-        boxes.append([x, y, width_box, height_box])
-
-    indices = cv2.dnn.NMSBoxes(boxes, scores.tolist(), conf_thresh, nms_thresh)
-    
-    final_boxes = []
-    final_scores = []
-    final_classes = []
-    
-    if len(indices) > 0:
-        for i in indices.flatten():
-            x, y, w, h = boxes[i]
-            norm_box = [
-                y / input_height,       
-                x / input_width,        
-                (y + h) / input_height, 
-                (x + w) / input_width   
-            ]
-            final_boxes.append(norm_box)
-            final_scores.append(scores[i])
-            final_classes.append(0)
-
-    return final_boxes, final_classes, final_scores
-
 def run_inference(image):
     """Runs inference on a single frame."""
-    input_data = np.expand_dims(image, axis=0)
-
-    if input_type == np.float32:
-        input_data = (input_data.astype(np.float32) / 255.0)
-    elif input_type == np.int8:
-        input_data = (input_data.astype(np.float32) - 128).astype(np.int8)
-    elif input_type == np.uint8:
-        input_data = input_data.astype(np.uint8)
-
-    interpreter.set_tensor(input_details[0]['index'], input_data)
-    interpreter.invoke()
-
-    output_data = interpreter.get_tensor(output_details[0]['index'])
-    return yolo_postprocess(output_data, CONFIDENCE_THRESHOLD, NMS_THRESHOLD)
+    output_data = invoke(interpreter, input_details, output_details, image)
+    return yolo_postprocess(output_data, CONFIDENCE_THRESHOLD, NMS_THRESHOLD, input_width, input_height)
 
-def save_detection(frame, box, score):
+def save_detection(frame, box, score, jpeg_quality=95):
     h, w, _ = frame.shape
     ymin, xmin, ymax, xmax = box
     
@@ -169,15 +128,26 @@ def save_detection(frame, box, score):
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
     
     filename = f"{VIDEO_PATH}detect_{int(time.time())}_{score:.2f}.jpg"
-    cv2.imwrite(filename, out_img)
+    cv2.imwrite(filename, out_img, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    # Box next to the image, used by the road condition report for crops
+    with open(f"{filename[:-4]}.json", 'w') as f:
+        json.dump({'bbox': [float(v) for v in box], 'score': float(score)}, f)
     print(f"[AI] Pothole detected! Saved: {filename}")
 
 def main():
-    global recording, current_filename
+    global recording, current_filename, governor
 
     if not os.path.exists(VIDEO_PATH):
         os.makedirs(VIDEO_PATH)
 
+    governor = ThermalGovernor(
+        SysfsThermalReader(),
+        log_path=f"{VIDEO_PATH}governor_{int(time.time())}.jsonl",
+        latency_ratio=LATENCY_RATIO,
+        temp_high=TEMP_HIGH,
+        temp_low=TEMP_LOW
+    )
+
     print("Ready. Waiting for RC switch...")
 
     try:
@@ -188,33 +158,51 @@ def main():
                 switch_val = channels[AUX_CHANNEL_INDEX]
                 
                 if switch_val > TRIGGER_VALUE and not recording:
-                    unique_id = str(uuid.uuid4())[:8]
-                    current_filename = f"{VIDEO_PATH}flight_{int(time.time())}_{unique_id}.h264"
-                    print(f"[REC] Starting: {current_filename}")
-                    picam2.start_recording(encoder, current_filename)
+                    if RECORDING_MODE == 'clips':
+                        clip_recorder.start()
+                    else:
+                        unique_id = str(uuid.uuid4())[:8]
+                        current_filename = f"{VIDEO_PATH}flight_{int(time.time())}_{unique_id}.h264"
+                        print(f"[REC] Starting: {current_filename}")
+                        picam2.start_recording(encoder, current_filename)
                     recording = True
                     
                 elif switch_val < TRIGGER_VALUE and recording:
                     print(f"[REC] Stopping.")
-                    picam2.stop_recording()
+                    if RECORDING_MODE == 'clips':
+                        clip_recorder.stop()
+                    else:
+                        picam2.stop_recording()
                     recording = False
 
             if recording:
-                try:
-                    # Capture RAW YUV data
-                    yuv_frame_ref = picam2.capture_array("lores")
-                    yuv_frame = yuv_frame_ref.copy() 
-                    del yuv_frame_ref 
-                    rgb_frame = yuv420_to_rgb(yuv_frame, input_width, input_height)
-                    boxes, classes, scores = run_inference(rgb_frame)
-                    
-                    for i in range(len(scores)):
-                        if scores[i] > CONFIDENCE_THRESHOLD:
-                            save_detection(rgb_frame, boxes[i], scores[i])
-                            break 
-                            
-                except Exception as e:
-                    print(f"Frame drop warning: {e}")
+                now = time.time()
+                governor.update(now)
+
+                if governor.should_infer(now):
+                    try:
+                        start = time.perf_counter()
+                        # Capture RAW YUV data
+                        yuv_frame_ref = picam2.capture_array("lores")
+                        yuv_frame = yuv_frame_ref.copy() 
+                        del yuv_frame_ref 
+                        rgb_frame = yuv420_to_rgb(yuv_frame, input_width, input_height)
+                        boxes, classes, scores = run_inference(rgb_frame)
+                        governor.record_latency(time.perf_counter() - start)
+                        
+                        for i in range(len(scores)):
+                            if scores[i] > CONFIDENCE_THRESHOLD:
+                                save_detection(rgb_frame, boxes[i], scores[i], governor.settings['jpeg_quality'])
+                                clip_recorder.trigger(time.time())
+                                break 
+                                
+                    except Exception as e:
+                        print(f"Frame drop warning: {e}")
+                else:
+                    # Leave the CPU to the H264 encoder until the next inference is due
+                    time.sleep(0.01)
+
+                clip_recorder.update(time.time())
             
             if not recording:
                 time.sleep(0.05)
@@ -222,6 +210,9 @@ def main():
     except KeyboardInterrupt:
         print("Stopping...")
     finally:
+        clip_recorder.stop()
+        if governor:
+            governor.close()
         picam2.stop()
         ser.close()
 
@@ -0,0 +1,99 @@
+import time
+import uuid
+
+
+def plan_clips(detection_times, pre_roll, post_roll):
+    """
+    Clip intervals the ClipRecorder writes for the given detection times.
+
+    A detection whose pre-roll overlaps the post-roll of the previous clip
+    extends that clip, so overlapping clips are merged into one file. To allow
+    this, a clip is only closed pre_roll seconds after its post-roll ends.
+    Used offline to replay recorded flights.
+
+    Returns:
+        list: (start, end) tuples in seconds, end including the closing delay
+    """
+    clips = []
+    for t in sorted(detection_times):
+        if clips and t - pre_roll <= clips[-1][1]:
+            clips[-1][1] = t + post_roll
+        else:
+            clips.append([max(0.0, t - pre_roll), t + post_roll])
+    return [(start, end + pre_roll) for start, end in clips]
+
+
+class ClipRecorder:
+    """
+    Detection-triggered recording with a pre-trigger ring buffer in RAM.
+
+    The encoder writes into a CircularOutput holding the last pre_roll seconds
+    of H264. A detection flushes that buffer to a new clip file and keeps
+    writing until post_roll seconds after the last detection. The clip stays
+    open for another pre_roll seconds, so a detection whose pre-roll overlaps
+    it extends the clip instead of writing the same frames to a second file.
+
+    Args:
+        picam2: Started Picamera2 instance
+        encoder: H264Encoder used for the main stream
+        video_path (str): Output folder (with trailing slash)
+        pre_roll (float): Seconds kept before a detection
+        post_roll (float): Seconds recorded after the last detection
+        fps (int): Frame rate of the main stream (sizes the ring buffer)
+    """
+
+    def __init__(self, picam2, encoder, video_path, pre_roll=5.0, post_roll=5.0, fps=30):
+        self.picam2 = picam2
+        self.encoder = encoder
+        self.video_path = video_path
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.fps = fps
+        self.output = None
+        self.flight_id = None
+        self.clip_filename = None
+        self.stop_at = None
+        self.clip_count = 0
+
+    def start(self):
+        """Start encoding into the ring buffer (AUX switch up)."""
+        from picamera2.outputs import CircularOutput
+
+        self.flight_id = f"{int(time.time())}_{str(uuid.uuid4())[:8]}"
+        self.clip_count = 0
+        self.output = CircularOutput(buffersize=int(self.pre_roll * self.fps))
+        self.picam2.start_recording(self.encoder, self.output)
+        print(f"[REC] Ring buffer started: {self.pre_roll:.0f}s pre-roll, {self.post_roll:.0f}s post-roll")
+
+    def trigger(self, now):
+        """Called on every detection: open a clip or extend the open one."""
+        if self.output is None:
+            return
+        if self.stop_at is None:
+            self.clip_filename = f"{self.video_path}clip_{self.flight_id}_{int(now)}.h264"
+            self.output.fileoutput = self.clip_filename
+            self.output.start()
+            self.clip_count += 1
+            print(f"[REC] Clip started: {self.clip_filename}")
+        self.stop_at = now + self.post_roll
+
+    def update(self, now):
+        """Called once per loop iteration: close the clip after the post-roll and closing delay."""
+        if self.stop_at is not None and now >= self.stop_at + self.pre_roll:
+            self.output.stop()
+            print(f"[REC] Clip saved: {self.clip_filename}")
+            self.stop_at = None
+            self.clip_filename = None
+
+    def stop(self):
+        """Close an open clip and stop encoding (AUX switch down)."""
+        if self.output is None:
+            return
+        if self.stop_at is not None:
+            self.output.stop()
+            print(f"[REC] Clip saved: {self.clip_filename}")
+            self.stop_at = None
+            self.clip_filename = None
+        self.picam2.stop_recording()
+        self.output = None
+        print(f"[REC] Ring buffer stopped, {self.clip_count} clip(s) this flight.")
@@ -0,0 +1,113 @@
+import os
+import cv2
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter, load_delegate
+except ImportError:
+    # Ground station without tflite_runtime: the full TensorFlow package ships the same API
+    from tensorflow.lite.python.interpreter import Interpreter, load_delegate
+
+# Shared by camera_control.py (in flight) and the offline tools in ai-model/,
+# so both produce exactly the same detections for the same frame.
+
+EDGETPU_LIBRARY = 'libedgetpu.so.1'
+
+
+def cpu_model_for(model_path):
+    """Model to use on the CPU when an Edge TPU compiled model cannot be delegated."""
+    root, ext = os.path.splitext(model_path)
+    if root.endswith('_edgetpu'):
+        return root[:-len('_edgetpu')] + ext
+    return model_path
+
+
+def load_interpreter(model_path, use_edgetpu=True, num_threads=None):
+    """
+    Create an interpreter, preferring the Edge TPU and falling back to the CPU.
+
+    Returns:
+        tuple: (interpreter, on_edgetpu)
+    """
+    if use_edgetpu:
+        try:
+            delegate = load_delegate(EDGETPU_LIBRARY)
+            interpreter = Interpreter(
+                model_path=model_path,
+                experimental_delegates=[delegate],
+                num_threads=num_threads
+            )
+            interpreter.allocate_tensors()
+            return interpreter, True
+        except (ValueError, OSError, RuntimeError) as e:
+            print(f"Edge TPU not available ({e}), falling back to CPU")
+
+    interpreter = Interpreter(model_path=cpu_model_for(model_path), num_threads=num_threads)
+    interpreter.allocate_tensors()
+    return interpreter, False
+
+
+def preprocess(image, input_type):
+    """Convert an RGB frame at model input size into a batched input tensor."""
+    input_data = np.expand_dims(image, axis=0)
+
+    if input_type == np.float32:
+        input_data = (input_data.astype(np.float32) / 255.0)
+    elif input_type == np.int8:
+        input_data = (input_data.astype(np.float32) - 128).astype(np.int8)
+    elif input_type == np.uint8:
+        input_data = input_data.astype(np.uint8)
+
+    return input_data
+
+
+def invoke(interpreter, input_details, output_details, image):
+    """Runs the model on a single frame and returns the raw output tensor."""
+    interpreter.set_tensor(input_details[0]['index'], preprocess(image, input_details[0]['dtype']))
+    interpreter.invoke()
+    return interpreter.get_tensor(output_details[0]['index'])
+
+
+def yolo_postprocess(output_data, conf_thresh, nms_thresh, input_width, input_height):
+    """Parses YOLOv8 output: Shape [1, 12, 2100]"""
+    predictions = np.transpose(output_data[0])
+    scores = np.max(predictions[:, 4:], axis=1)
+
+    keep_indices = np.where(scores > conf_thresh)[0]
+    predictions = predictions[keep_indices]
+    scores = scores[keep_indices]
+
+    if len(scores) == 0:
+        return [], [], []
+
+    box_data = predictions[:, :4]
+
+    boxes = []
+    for i in range(len(box_data)):
+        cx, cy, w, h = box_data[i]
+        x = int(cx - w/2)
+        y = int(cy - h/2)
+        width_box = int(w)
+        height_box = int(h)
+        boxes.append([x, y, width_box, height_box])
+
+    indices = cv2.dnn.NMSBoxes(boxes, scores.tolist(), conf_thresh, nms_thresh)
+
+    final_boxes = []
+    final_scores = []
+    final_classes = []
+
+    if len(indices) > 0:
+        for i in indices.flatten():
+            x, y, w, h = boxes[i]
+            norm_box = [
+                y / input_height,
+                x / input_width,
+                (y + h) / input_height,
+                (x + w) / input_width
+            ]
+            final_boxes.append(norm_box)
+            final_scores.append(scores[i])
+            final_classes.append(0)
+
+    return final_boxes, final_classes, final_scores
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+np = pytest.importorskip('numpy')
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-model', 'report')))
+from build_report import assign_segment, build_report, load_state, rebuild_segments, update_segment
+
+
+def add_detection(state, timestamp, score, segment_seconds=30):
+    flight_id, index = assign_segment(state['flights'], timestamp, segment_seconds)
+    key = f"{flight_id}/{index:03d}"
+    update_segment(state['segments'], key, flight_id, index, timestamp, score)
+    state['detections'].append({'image': f"detect_{timestamp}.jpg", 'timestamp': timestamp,
+                                'score': score, 'segment': key})
+
+
+def touch(path, data=b''):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def write_image(path):
+    cv2.imwrite(str(path), np.zeros((48, 64, 3), dtype=np.uint8))
+
+
+def segments_by_image(report_dir):
+    with open(os.path.join(report_dir, 'report_state.json'), 'r') as f:
+        state = json.load(f)
+    return {os.path.basename(det['image']): det['segment'] for det in state['detections']}, state
+
+
+def test_rebuild_moves_detection_from_earlier_flight():
+    state = load_state('/nonexistent/report_state.json')
+    state['flights']['aaaa'] = {'start': 1000, 'video': 'flight_1000_aaaa.h264'}
+    add_detection(state, 1050, 0.7)
+    add_detection(state, 2100, 0.9)
+    assert [det['segment'] for det in state['detections']] == ['aaaa/001', 'aaaa/036']
+
+    state['flights']['bbbb'] = {'start': 2000, 'video': 'flight_2000_bbbb.h264'}
+    assert rebuild_segments(state, 30) == 1
+    assert [det['segment'] for det in state['detections']] == ['aaaa/001', 'bbbb/003']
+    assert set(state['segments']) == {'aaaa/001', 'bbbb/003'}
+    assert state['segments']['bbbb/003']['score_max'] == 0.9
+
+
+def test_rebuild_moves_unassigned_detection():
+    state = load_state('/nonexistent/report_state.json')
+    add_detection(state, 2100, 0.9)
+    assert state['detections'][0]['segment'] == 'unassigned/000'
+
+    state['flights']['bbbb'] = {'start': 2000, 'video': 'flight_2000_bbbb.h264'}
+    assert rebuild_segments(state, 30) == 1
+    assert list(state['segments']) == ['bbbb/003']
+
+
+def test_late_flight_recording_reassigns_detection(tmp_path):
+    flights, report = tmp_path / 'flights', tmp_path / 'report'
+    flights.mkdir()
+    touch(flights / 'flight_1000_aaaa.h264')
+    write_image(flights / 'detect_2100_0.90.jpg')
+
+    build_report([str(flights)], str(report), segment_seconds=30, workers=1)
+    assert segments_by_image(report)[0] == {'detect_2100_0.90.jpg': 'aaaa/036'}
+
+    touch(flights / 'flight_2000_bbbb.h264')
+    build_report([str(flights)], str(report), segment_seconds=30, workers=1)
+    segments, state = segments_by_image(report)
+    assert segments == {'detect_2100_0.90.jpg': 'bbbb/003'}
+    assert list(state['segments']) == ['bbbb/003']
+
+
+def test_unreadable_image_is_retried(tmp_path):
+    flights, report = tmp_path / 'flights', tmp_path / 'report'
+    flights.mkdir()
+    touch(flights / 'flight_1000_aaaa.h264')
+    touch(flights / 'detect_1010_0.80.jpg', b'\xff\xd8 half copied')
+
+    build_report([str(flights)], str(report), segment_seconds=30, workers=1)
+    segments, state = segments_by_image(report)
+    assert segments == {}
+    assert state['processed'] == {}
+
+    write_image(flights / 'detect_1010_0.80.jpg')
+    build_report([str(flights)], str(report), segment_seconds=30, workers=1)
+    segments, state = segments_by_image(report)
+    assert segments == {'detect_1010_0.80.jpg': 'aaaa/000'}
+    assert state['detections'][0]['thumb'] is not None
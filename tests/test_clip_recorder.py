@@ -0,0 +1,28 @@
+import os
+import sys
+
+# Add repository root to path to import the drone code
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from clip_recorder import plan_clips
+
+
+def test_single_detection():
+    assert plan_clips([20.0], 5.0, 5.0) == [(15.0, 30.0)]
+
+
+def test_pre_roll_clamped_to_flight_start():
+    assert plan_clips([2.0], 5.0, 5.0) == [(0.0, 12.0)]
+
+
+def test_overlapping_windows_are_merged():
+    # 18 - 5 = 13 overlaps the post-roll of 12 (ends at 17)
+    assert plan_clips([10.0, 12.0, 18.0, 22.0], 5.0, 5.0) == [(5.0, 32.0)]
+
+
+def test_detection_just_after_post_roll_extends_clip():
+    # The clip is still open (closing delay), so the pre-roll is not written twice
+    assert plan_clips([10.0, 19.0], 5.0, 5.0) == [(5.0, 29.0)]
+
+
+def test_separate_clips():
+    assert plan_clips([30.0, 10.0, 12.0], 5.0, 5.0) == [(5.0, 22.0), (25.0, 40.0)]
@@ -0,0 +1,187 @@
+import json
+import os
+import sys
+
+# Add repository root to path to import the drone code
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from thermal_governor import FileThermalReader, ThermalGovernor, replay
+
+
+def write_sample(path, temp_c, throttled=0):
+    with open(path, 'w') as f:
+        f.write(f"{temp_c} {throttled:x}\n")
+
+
+def make_governor(tmp_path, log_path=None, **args):
+    sample_path = tmp_path / 'thermal.txt'
+    write_sample(sample_path, 50.0)
+    governor = ThermalGovernor(FileThermalReader(str(sample_path)), log_path=log_path, **args)
+    return governor, sample_path
+
+
+def run(governor, start, seconds, latency=None):
+    """Sample once per second; returns the decisions."""
+    decisions = []
+    for now in range(start, start + seconds):
+        if latency is not None:
+            governor.record_latency(latency, alpha=1.0)
+        decisions.append(governor.update(float(now)))
+    return decisions
+
+
+def test_file_reader_parses_temperature_and_throttle_bits(tmp_path):
+    path = tmp_path / 'thermal.txt'
+    write_sample(path, 71.5, 0x50005)
+    assert FileThermalReader(str(path)).read() == {'temp_c': 71.5, 'throttled': 0x50005}
+
+
+def test_steps_down_on_heat(tmp_path):
+    governor, sample_path = make_governor(tmp_path)
+    run(governor, 0, 3)
+    assert governor.level == 0
+
+    write_sample(sample_path, 80.0)
+    decision = governor.update(3.0)
+    assert decision['action'] == 'down'
+    assert governor.level == 1
+    assert governor.settings['inference_interval'] > 0
+
+
+def test_steps_down_on_throttle_bits(tmp_path):
+    governor, sample_path = make_governor(tmp_path)
+    write_sample(sample_path, 50.0, 0x4)
+    decision = governor.update(0.0)
+    assert decision['action'] == 'down'
+    assert decision['reason'] == 'throttled=0x4'
+
+
+def test_ignores_past_throttle_bits(tmp_path):
+    governor, sample_path = make_governor(tmp_path)
+    # Only "has occurred since boot" bits set
+    write_sample(sample_path, 50.0, 0x50000)
+    run(governor, 0, 5)
+    assert governor.level == 0
+
+
+def test_settle_time_limits_step_down_rate(tmp_path):
+    governor, sample_path = make_governor(tmp_path, settle_seconds=3.0)
+    write_sample(sample_path, 80.0)
+    decisions = run(governor, 0, 7)
+    assert [d['level'] for d in decisions] == [1, 1, 1, 2, 2, 2, 3]
+
+
+def test_never_steps_below_lightest_level(tmp_path):
+    governor, sample_path = make_governor(tmp_path)
+    write_sample(sample_path, 90.0, 0xF)
+    run(governor, 0, 60)
+    assert governor.level == len(governor.levels) - 1
+
+
+def test_holds_level_between_temp_low_and_temp_high(tmp_path):
+    governor, sample_path = make_governor(tmp_path, hold_seconds=10.0)
+    write_sample(sample_path, 80.0)
+    run(governor, 0, 1)
+    assert governor.level == 1
+
+    write_sample(sample_path, 70.0)
+    run(governor, 1, 30)
+    assert governor.level == 1
+
+
+def test_steps_up_after_cooling_and_hold(tmp_path):
+    governor, sample_path = make_governor(tmp_path, hold_seconds=10.0)
+    write_sample(sample_path, 80.0)
+    run(governor, 0, 1)
+    assert governor.level == 1
+
+    # The hold time counts from the last change
+    write_sample(sample_path, 60.0)
+    decisions = run(governor, 1, 10)
+    assert [d['action'] for d in decisions[:-1]] == ['hold'] * 9
+    assert decisions[-1]['action'] == 'up'
+    assert governor.level == 0
+
+
+def test_latency_steps_down_when_slower_than_cool_baseline(tmp_path):
+    governor, sample_path = make_governor(tmp_path, latency_ratio=1.3)
+    run(governor, 0, 10, latency=0.1)
+    assert governor.baseline_latency == 0.1
+
+    write_sample(sample_path, 70.0)
+    run(governor, 10, 10, latency=0.12)
+    assert governor.level == 0
+
+    governor.record_latency(0.2, alpha=1.0)
+    decision = governor.update(20.0)
+    assert decision['action'] == 'down'
+    assert decision['reason'].startswith('latency')
+
+
+def test_slow_model_does_not_step_down_while_warm(tmp_path):
+    governor, sample_path = make_governor(tmp_path, latency_ratio=1.3)
+
+    # CPU fallback: slow, but not slower than when the SoC was cool
+    run(governor, 0, 30, latency=0.3)
+    write_sample(sample_path, 70.0)
+    run(governor, 30, 60, latency=0.3)
+    assert governor.level == 0
+
+
+def test_latency_ignored_without_cool_baseline(tmp_path):
+    governor, sample_path = make_governor(tmp_path)
+    write_sample(sample_path, 70.0)
+    run(governor, 0, 30, latency=0.5)
+    assert governor.baseline_latency is None
+    assert governor.level == 0
+
+
+def test_recovers_after_hot_spell_with_slow_model(tmp_path):
+    governor, sample_path = make_governor(tmp_path, hold_seconds=10.0)
+    write_sample(sample_path, 80.0)
+    run(governor, 0, 20, latency=0.3)
+    assert governor.level == len(governor.levels) - 1
+
+    write_sample(sample_path, 55.0)
+    run(governor, 20, 60, latency=0.22)
+    assert governor.level == 0
+
+
+def test_sample_interval(tmp_path):
+    governor, sample_path = make_governor(tmp_path, sample_interval=1.0)
+    assert governor.update(0.0) is not None
+    assert governor.update(0.5) is None
+    assert governor.update(1.0) is not None
+
+
+def test_should_infer_follows_level_interval(tmp_path):
+    governor, sample_path = make_governor(tmp_path)
+    assert governor.should_infer(0.0)
+    assert governor.should_infer(0.01)
+
+    governor.level = 2
+    interval = governor.settings['inference_interval']
+    assert governor.should_infer(1.0)
+    assert not governor.should_infer(1.0 + interval / 2)
+    assert governor.should_infer(1.0 + interval)
+
+
+def test_replay_round_trip(tmp_path):
+    log_path = tmp_path / 'governor.jsonl'
+    governor, sample_path = make_governor(tmp_path, log_path=str(log_path))
+    for temp_c, seconds in ((50.0, 5), (80.0, 10), (60.0, 40)):
+        write_sample(sample_path, temp_c)
+        run(governor, int(governor.last_sample or -1) + 1, seconds, latency=0.1)
+    governor.close()
+
+    with open(log_path, 'r') as f:
+        recorded = [json.loads(line) for line in f]
+    assert len(recorded) == 55
+
+    # Same parameters: same decisions
+    replayed = replay(str(log_path))
+    assert [d['level'] for d in replayed] == [d['level'] for d in recorded]
+    assert [d['action'] for d in replayed] == [d['action'] for d in recorded]
+
+    # A higher temp_high never reacts to the 80 C spell
+    relaxed = replay(str(log_path), temp_high=85.0, temp_low=65.0)
+    assert all(d['level'] == 0 for d in relaxed)
@@ -0,0 +1,227 @@
+import json
+import os
+import subprocess
+
+# Bits of the firmware throttle state (vcgencmd get_throttled) that are active right now:
+# under-voltage, ARM frequency capped, currently throttled, soft temperature limit
+THROTTLE_ACTIVE_MASK = 0xF
+
+# Degradation levels, from full rate (level 0) to the lightest load
+LEVELS = [
+    {'inference_interval': 0.0, 'jpeg_quality': 95},
+    {'inference_interval': 0.2, 'jpeg_quality': 90},
+    {'inference_interval': 0.5, 'jpeg_quality': 80},
+    {'inference_interval': 1.0, 'jpeg_quality': 70},
+]
+
+
+class SysfsThermalReader:
+    """
+    Reads SoC temperature and throttle state on the Raspberry Pi.
+
+    Uses the firmware's sysfs throttle file when the kernel provides it, and
+    falls back to `vcgencmd get_throttled` otherwise.
+    """
+
+    def __init__(self, temp_path='/sys/class/thermal/thermal_zone0/temp',
+                 throttle_path='/sys/devices/platform/soc/soc:firmware/get_throttled'):
+        self.temp_path = temp_path
+        self.throttle_path = throttle_path if os.path.exists(throttle_path) else None
+
+    def read(self):
+        with open(self.temp_path, 'r') as f:
+            temp_c = int(f.read().strip()) / 1000.0
+
+        throttled = 0
+        try:
+            if self.throttle_path:
+                with open(self.throttle_path, 'r') as f:
+                    throttled = int(f.read().strip(), 16)
+            else:
+                out = subprocess.run(['vcgencmd', 'get_throttled'], capture_output=True, text=True, timeout=1)
+                throttled = int(out.stdout.strip().split('=')[1], 16)
+        except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+            pass
+
+        return {'temp_c': temp_c, 'throttled': throttled}
+
+
+class FileThermalReader:
+    """
+    Fake reader for bench tests: reads "<temp_c> [<throttled hex>]" from a text
+    file, so heating and throttling can be simulated by rewriting the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        with open(self.path, 'r') as f:
+            values = f.read().split()
+        temp_c = float(values[0]) if values else 0.0
+        throttled = int(values[1], 16) if len(values) > 1 else 0
+        return {'temp_c': temp_c, 'throttled': throttled}
+
+
+class ThermalGovernor:
+    """
+    Adjusts inference cadence and snapshot quality to temperature, throttling
+    and measured inference latency.
+
+    The governor steps one level down (lighter load) when the SoC is hot or
+    the firmware reports throttling. Between temp_low and temp_high, a latency
+    above latency_ratio times the baseline also steps down: a slower inference
+    there means the CPU is heating towards its limit, and a lower cadence is
+    what cools it. The baseline is the latency last measured at or below
+    temp_low, so a model that is simply slow (e.g. on the CPU fallback) does
+    not count as slowing down; without a cool baseline the latency is ignored.
+    The governor steps back up after hold_seconds of cool, unthrottled
+    operation. Every evaluation is written as a JSON line to log_path, so the
+    thresholds can be tuned with replay() on recorded flights.
+
+    Args:
+        reader: Object with read() -> {'temp_c', 'throttled'}
+        log_path (str): JSON lines decision log (None = no log)
+        latency_ratio (float): Step down while warm when the latency exceeds this multiple of the cool baseline
+        temp_high (float): Step down at or above this temperature (°C)
+        temp_low (float): Step up only at or below this temperature (°C)
+        sample_interval (float): Seconds between reader samples
+        hold_seconds (float): Minimum time at a level before stepping up
+        settle_seconds (float): Minimum time after a change before stepping down again
+        levels (list): Settings per level
+    """
+
+    def __init__(self, reader, log_path=None, latency_ratio=1.3, temp_high=75.0, temp_low=65.0,
+                 sample_interval=1.0, hold_seconds=10.0, settle_seconds=3.0, levels=LEVELS):
+        self.reader = reader
+        self.latency_ratio = latency_ratio
+        self.temp_high = temp_high
+        self.temp_low = temp_low
+        self.sample_interval = sample_interval
+        self.hold_seconds = hold_seconds
+        self.settle_seconds = settle_seconds
+        self.levels = levels
+
+        self.level = 0
+        self.latency = None
+        self.baseline_latency = None
+        self.last_sample = None
+        self.last_change = None
+        self.last_inference = None
+        self.log = open(log_path, 'a') if log_path else None
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def should_infer(self, now):
+        """True if the current level allows an inference at time now."""
+        interval = self.settings['inference_interval']
+        if self.last_inference is None or now - self.last_inference >= interval:
+            self.last_inference = now
+            return True
+        return False
+
+    def record_latency(self, seconds, alpha=0.2):
+        """Feed the measured capture + inference time into a moving average."""
+        self.latency = seconds if self.latency is None else alpha * seconds + (1 - alpha) * self.latency
+
+    def update(self, now):
+        """Sample the reader every sample_interval seconds and re-evaluate the level."""
+        if self.last_sample is not None and now - self.last_sample < self.sample_interval:
+            return None
+        self.last_sample = now
+        try:
+            sample = self.reader.read()
+        except (OSError, ValueError) as e:
+            print(f"[GOV] Thermal reader failed: {e}")
+            return None
+        return self.evaluate(now, sample['temp_c'], sample['throttled'], self.latency)
+
+    def evaluate(self, now, temp_c, throttled, latency):
+        """
+        Decide the level for one sample. Returns the decision record.
+        """
+        action, reason = 'hold', ''
+        throttling = bool(throttled & THROTTLE_ACTIVE_MASK)
+
+        warm = temp_c > self.temp_low
+        if not warm and not throttling and latency is not None:
+            self.baseline_latency = latency
+        baseline = self.baseline_latency
+        slow = warm and latency is not None and baseline is not None and latency > baseline * self.latency_ratio
+
+        if temp_c >= self.temp_high or throttling or slow:
+            if throttling:
+                reason = f"throttled=0x{throttled:x}"
+            elif temp_c >= self.temp_high:
+                reason = f"temp {temp_c:.1f}C >= {self.temp_high:.1f}C"
+            else:
+                reason = f"latency {latency * 1000:.0f}ms > {self.latency_ratio:.1f}x cool {baseline * 1000:.0f}ms"
+            settled = self.last_change is None or now - self.last_change >= self.settle_seconds
+            if self.level < len(self.levels) - 1 and settled:
+                self.level += 1
+                self.last_change = now
+                action = 'down'
+        elif (self.level > 0 and not warm
+              and (self.last_change is None or now - self.last_change >= self.hold_seconds)):
+            self.level -= 1
+            self.last_change = now
+            action, reason = 'up', f"cool {temp_c:.1f}C"
+
+        decision = {
+            't': round(now, 3),
+            'temp_c': temp_c,
+            'throttled': throttled,
+            'latency_ms': round(latency * 1000, 1) if latency is not None else None,
+            'baseline_ms': round(baseline * 1000, 1) if baseline is not None else None,
+            'level': self.level,
+            'action': action,
+            'reason': reason,
+        }
+        if self.log:
+            self.log.write(json.dumps(decision) + '\n')
+            self.log.flush()
+        if action != 'hold':
+            print(f"[GOV] Level {self.level} ({action}): {reason} -> {self.settings}")
+        return decision
+
+    def close(self):
+        if self.log:
+            self.log.close()
+            self.log = None
+
+
+def replay(log_path, **governor_args):
+    """
+    Re-run a recorded decision log through a governor with other parameters.
+
+    The recorded latencies come from the original levels, so the replay shows
+    when the new thresholds would have reacted, not the latency they would have produced.
+
+    Returns:
+        list: Decision records of the replayed governor
+    """
+    governor = ThermalGovernor(reader=None, **governor_args)
+    decisions = []
+    with open(log_path, 'r') as f:
+        for line in f:
+            record = json.loads(line)
+            latency = record['latency_ms'] / 1000 if record['latency_ms'] is not None else None
+            decisions.append(governor.evaluate(record['t'], record['temp_c'], record['throttled'], latency))
+
+    if decisions:
+        duration = decisions[-1]['t'] - decisions[0]['t']
+        changes = sum(1 for d in decisions if d['action'] != 'hold')
+        print(f"Replayed {len(decisions)} samples over {duration:.0f}s, {changes} level changes")
+        for level in range(len(governor.levels)):
+            share = sum(1 for d in decisions if d['level'] == level) / len(decisions) * 100
+            print(f"Level {level}: {share:5.1f}% of samples  {governor.levels[level]}")
+    return decisions
+
+
+if __name__ == "__main__":
+    # Configuration: tune the thresholds against a governor log copied from the drone
+    LOG_PATH = 'governor.jsonl'
+
+    replay(LOG_PATH, latency_ratio=1.3, temp_high=75.0, temp_low=65.0, hold_seconds=10.0)